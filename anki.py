@@ -1,7 +1,12 @@
+import asyncio
 import json
-import urllib.request
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
+
+import aiohttp
+import orjson
+
+from retry import with_retry
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -9,45 +14,73 @@ logger = logging.getLogger(__name__)
 # AnkiConnect configuration
 ANKI_CONNECT_URL = 'http://127.0.0.1:8765'
 
+# Shared aiohttp session, created lazily on first use. Reusing one keep-alive
+# connection avoids a TCP handshake per AnkiConnect call and lets requests run
+# without blocking the event loop.
+_session: Optional[aiohttp.ClientSession] = None
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it if needed."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=8, keepalive_timeout=60)
+        _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
 def request(action: str, **params: Any) -> Dict[str, Any]:
     """Create a request payload for AnkiConnect."""
     return {'action': action, 'params': params, 'version': 6}
 
-def invoke(action: str, **params: Any) -> Any:
+async def _post(request_data: Dict[str, Any]) -> Any:
+    """POST a payload to AnkiConnect and return the parsed JSON response."""
+    # Encode with orjson: json= would run stdlib json.dumps on the event
+    # loop, which takes tens of ms for addNotes batches of thousands of cards
+    body = orjson.dumps(request_data)
+    session = await _get_session()
+    async with session.post(ANKI_CONNECT_URL, data=body,
+                            headers={'Content-Type': 'application/json'}) as r:
+        r.raise_for_status()
+        raw = await r.read()
+    # orjson parses large addNotes responses (thousands of note IDs)
+    # several times faster than the stdlib decoder
+    return orjson.loads(raw)
+
+async def invoke(action: str, **params: Any) -> Any:
     """Invoke an AnkiConnect action and return the result."""
     try:
         request_data = request(action, **params)
-        request_json = json.dumps(request_data).encode('utf-8')
-        
-        logger.debug(f"AnkiConnect request: {action} with params: {params}")
-        
-        req = urllib.request.Request(ANKI_CONNECT_URL, request_json)
-        response = json.load(urllib.request.urlopen(req))
-        
+
+        logger.debug("AnkiConnect request: %s with params: %s", action, params)
+
+        response = await with_retry(_post, request_data)
+
         # Validate response structure
         if not isinstance(response, dict) or len(response) != 2:
             raise Exception(f'Invalid response structure: expected 2 fields, got {len(response) if isinstance(response, dict) else "non-dict"}')
-        
+
         if 'error' not in response:
             raise Exception('Response is missing required error field')
-        
+
         if 'result' not in response:
             raise Exception('Response is missing required result field')
-        
+
         if response['error'] is not None:
             raise Exception(f'AnkiConnect error: {response["error"]}')
-        
-        logger.debug(f"AnkiConnect response: {response['result']}")
+
+        # The result can be large (e.g. thousands of note IDs), so skip even
+        # the lazy formatting unless debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("AnkiConnect response: %s", response['result'])
         return response['result']
-        
-    except urllib.error.URLError as e:
+
+    except aiohttp.ClientConnectorError as e:
         logger.error(f"Failed to connect to AnkiConnect: {str(e)}")
         raise Exception("Cannot connect to Anki. Please ensure Anki is running with AnkiConnect installed.") from e
-    
-    except json.JSONDecodeError as e:
+
+    except (json.JSONDecodeError, aiohttp.ContentTypeError) as e:
         logger.error(f"Invalid JSON response from AnkiConnect: {str(e)}")
         raise Exception("Invalid response from AnkiConnect") from e
-    
+
     except Exception as e:
         logger.error(f"AnkiConnect error: {str(e)}")
         raise
@@ -56,7 +89,7 @@ async def add_card(deck_name: str, question: str, answer: str) -> Any:
     """Add a single card to an Anki deck using the GUI."""
     if not deck_name or not question or not answer:
         raise ValueError("Deck name, question, and answer are all required")
-    
+
     note = {
         "deckName": deck_name.strip(),
         "modelName": "Basic",
@@ -69,71 +102,121 @@ async def add_card(deck_name: str, question: str, answer: str) -> Any:
         },
         "tags": []
     }
-    
+
     logger.info(f"Adding single card to deck '{deck_name}'")
-    result = invoke('guiAddCards', note=note)
-    return result 
+    result = await invoke('guiAddCards', note=note)
+    return result
 
-async def add_notes(notes: List[Dict[str, Any]]) -> List[Optional[int]]:
-    """Add multiple notes to Anki decks."""
-    if not notes:
-        logger.warning("No notes provided to add_notes")
-        return []
-    
-    # Validate notes structure
-    valid_notes = []
+# Keys every note must carry; checked with a single subset comparison
+_REQUIRED_NOTE_FIELDS = frozenset({'deckName', 'modelName', 'fields'})
+
+def _iter_valid_notes(notes: List[Dict[str, Any]]):
+    """Yield structurally valid notes, logging a warning for each one skipped."""
     for i, note in enumerate(notes):
         if not isinstance(note, dict):
             logger.warning(f"Skipping invalid note at index {i}: not a dict")
             continue
-        
-        required_fields = ['deckName', 'modelName', 'fields']
-        if not all(field in note for field in required_fields):
+
+        if not _REQUIRED_NOTE_FIELDS <= note.keys():
             logger.warning(f"Skipping invalid note at index {i}: missing required fields")
             continue
-        
+
         if not isinstance(note['fields'], dict) or 'Front' not in note['fields'] or 'Back' not in note['fields']:
             logger.warning(f"Skipping invalid note at index {i}: invalid fields structure")
             continue
-        
-        valid_notes.append(note)
-    
+
+        yield note
+
+async def add_notes(notes: List[Dict[str, Any]]) -> List[Optional[int]]:
+    """Add multiple notes to Anki decks."""
+    if not notes:
+        logger.warning("No notes provided to add_notes")
+        return []
+
+    valid_notes = list(_iter_valid_notes(notes))
+
     if not valid_notes:
         logger.error("No valid notes to add")
         return []
-    
+
     logger.info(f"Adding {len(valid_notes)} notes to Anki")
-    result = invoke('addNotes', notes=valid_notes)
-    
+
+    # Pack the duplicate preflight and the insert into one HTTP round-trip.
+    # Each sub-action carries 'version': 6 so its slot comes back as a
+    # {'result', 'error'} dict instead of a raw value that hides failures.
+    responses = await invoke('multi', actions=[
+        {'action': 'canAddNotes', 'version': 6, 'params': {'notes': valid_notes}},
+        {'action': 'addNotes', 'version': 6, 'params': {'notes': valid_notes}},
+    ])
+
+    # Surface per-action failures the same way invoke does for the top level
+    for action_name, response in zip(('canAddNotes', 'addNotes'), responses):
+        if not isinstance(response, dict) or 'error' not in response or 'result' not in response:
+            raise Exception(f'Invalid multi response for {action_name}: {response}')
+        if response['error'] is not None:
+            raise Exception(f'AnkiConnect error in {action_name}: {response["error"]}')
+
+    can_add, result = [r['result'] for r in responses]
+
+    if isinstance(can_add, list):
+        duplicate_count = sum(1 for ok in can_add if not ok)
+        if duplicate_count:
+            logger.info(f"{duplicate_count}/{len(valid_notes)} notes rejected as duplicates")
+
     # Log results
     if isinstance(result, list):
         success_count = sum(1 for r in result if r is not None)
         logger.info(f"Successfully added {success_count}/{len(valid_notes)} notes")
-    
+
     return result
 
+# Decks known to exist already; createDeck is only sent once per unique name
+_known_decks: Set[str] = set()
+_known_decks_lock = asyncio.Lock()
+_decks_seeded = False
+
 async def create_deck(deck_name: str) -> Any:
-    """Create a new Anki deck (or return existing deck ID if it exists)."""
+    """
+    Create a new Anki deck (or return existing deck ID if it exists).
+    Already-known deck names skip the AnkiConnect round-trip; the cache is
+    seeded from deckNames on first use so pre-existing decks count too.
+    """
+    global _decks_seeded
+
     if not deck_name or not deck_name.strip():
         raise ValueError("Deck name cannot be empty")
-    
+
     deck_name = deck_name.strip()
-    logger.info(f"Creating/ensuring deck exists: '{deck_name}'")
-    
-    try:
-        result = invoke('createDeck', deck=deck_name)
-        logger.info(f"Deck '{deck_name}' created/verified successfully")
-        return result
-    except Exception as e:
-        logger.error(f"Failed to create deck '{deck_name}': {str(e)}")
-        raise
+
+    async with _known_decks_lock:
+        if not _decks_seeded:
+            try:
+                _known_decks.update(await invoke('deckNames'))
+            except Exception as e:
+                # Seeding is best-effort; fall back to creating decks on demand
+                logger.debug("Could not seed deck name cache: %s", str(e))
+            _decks_seeded = True
+
+        if deck_name in _known_decks:
+            logger.debug("Deck '%s' already known, skipping createDeck", deck_name)
+            return None
+
+        logger.info(f"Creating/ensuring deck exists: '{deck_name}'")
+        try:
+            result = await invoke('createDeck', deck=deck_name)
+            _known_decks.add(deck_name)
+            logger.info(f"Deck '{deck_name}' created/verified successfully")
+            return result
+        except Exception as e:
+            logger.error(f"Failed to create deck '{deck_name}': {str(e)}")
+            raise
 
 async def sync_decks() -> None:
     """Synchronize Anki collection with AnkiWeb."""
     logger.info("Synchronizing Anki collection")
     try:
-        invoke('sync')
+        await invoke('sync')
         logger.info("Anki sync completed successfully")
     except Exception as e:
         logger.warning(f"Anki sync failed: {str(e)}")
-        # Don't raise here as sync failure shouldn't break the card creation process
\ No newline at end of file
+        # Don't raise here as sync failure shouldn't break the card creation process
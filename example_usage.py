@@ -6,6 +6,7 @@ This script demonstrates how to use the server programmatically
 without MCP client integration.
 """
 
+import argparse
 import asyncio
 import logging
 from server import search_notion_page, fetch_page_content, generate_flashcards_gpt, post_flashcards
@@ -134,7 +135,7 @@ async def test_individual_components():
     # Test 3: AnkiConnect
     try:
         from anki import invoke
-        result = invoke('version')
+        result = await invoke('version')
         logger.info(f"✅ AnkiConnect working, version: {result}")
     except Exception as e:
         logger.error(f"❌ AnkiConnect error: {str(e)}")
@@ -143,20 +144,20 @@ async def test_individual_components():
 if __name__ == "__main__":
     print("🚀 Notion-Anki MCP Server - Example Usage")
     print("=" * 50)
-    
-    # Choose which demo to run
-    print("Available demos:")
-    print("1. Full flashcard generation workflow")  
-    print("2. Test individual components")
-    
-    choice = input("\nEnter choice (1 or 2): ").strip()
-    
-    if choice == "1":
-        asyncio.run(demo_flashcard_generation())
-    elif choice == "2":
+
+    # Non-interactive selection so scripted/CI runs don't need a TTY
+    parser = argparse.ArgumentParser(description="Notion-Anki MCP Server example usage")
+    parser.add_argument(
+        '--demo',
+        choices=['full', 'components'],
+        default='full',
+        help="'full' runs the whole flashcard workflow, 'components' tests each piece separately (default: full)"
+    )
+    args = parser.parse_args()
+
+    if args.demo == 'components':
         asyncio.run(test_individual_components())
     else:
-        print("Invalid choice. Running full demo...")
         asyncio.run(demo_flashcard_generation())
-    
+
     print("\n🎓 Happy studying!")
\ No newline at end of file
@@ -1,13 +1,24 @@
 import os
 import asyncio
 import logging
+import time
+from dataclasses import dataclass
 from typing import Dict, List, Any, Optional, Tuple, Set
+import httpx
 from dotenv import load_dotenv
 from notion_client import AsyncClient
 
+from retry import SlidingWindowLimiter, with_retry
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Notion allows ~3 requests per second per integration
+_notion_limiter = SlidingWindowLimiter(max_requests=3, window_seconds=1.0)
+
+# The heading block types Notion can return
+_HEADING_TYPES = frozenset({'heading_1', 'heading_2', 'heading_3'})
+
 load_dotenv()
 
 # Notion API configuration
@@ -19,152 +30,248 @@ notion_api_key = os.getenv("NOTION_API_KEY")
 if not notion_api_key:
     raise ValueError("NOTION_API_KEY environment variable is required")
 
-notion = AsyncClient(auth=notion_api_key)
+# HTTP/2 multiplexes the concurrent blocks.children.list calls over one
+# TCP+TLS connection, so the handshake is paid once per pipeline
+notion = AsyncClient(
+    auth=notion_api_key,
+    client=httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=60)
+    )
+)
 
 # Removed unused dummy function - using real Notion API implementation
 
+# Database titles resolved by earlier searches; hits skip the search endpoint
+# and fetch the single database object instead
+_db_id_cache: Dict[str, str] = {}
+
 async def search_notion_database(database_name: str) -> Optional[Dict[str, Any]]:
     """
     Searches for a Notion database by title using the Notion Search API.
     Returns the first matching database if found; otherwise returns None.
     """
     try:
+        cached_id = _db_id_cache.get(database_name)
+        if cached_id:
+            try:
+                db = await with_retry(notion.databases.retrieve, database_id=cached_id,
+                                      limiter=_notion_limiter)
+                return {'result': 'Found', 'database_id': db['id'], 'link': db['url']}
+            except Exception as e:
+                # Cached ID may be stale (database deleted or unshared);
+                # evict it and fall back to the search path
+                logger.warning(f"Cached ID for database '{database_name}' failed retrieve, re-searching: {str(e)}")
+                _db_id_cache.pop(database_name, None)
+
         logger.info(f"Searching for database: {database_name}")
-        databases = await notion.search(
+        databases = await with_retry(
+            notion.search,
             query=database_name,
-            filter={"property": "object", "value": "database"}
+            filter={"property": "object", "value": "database"},
+            page_size=5,
+            limiter=_notion_limiter
         )
-        
+
         if databases and databases.get('results'):
             for db in databases['results']:
                 if 'title' in db and db['title']:
                     db_title = db['title'][0]['text']['content'] if db['title'][0].get('text') else ''
                     if db_title == database_name:
                         logger.info(f"Found database: {database_name}")
+                        _db_id_cache[database_name] = db['id']
                         return {'result': 'Found', 'database_id': db['id'], 'link': db['url']}
-        
+
         logger.warning(f"Database not found: {database_name}")
         return None
-        
+
     except Exception as e:
         logger.error(f"Error searching for database {database_name}: {str(e)}")
         raise
 
+# Resolved page titles cached with a short TTL; repeated tool calls for the
+# same page hit RAM instead of Notion's rate-limited search endpoint
+_PAGE_CACHE_TTL = 300  # seconds
+_PAGE_CACHE_MAX = 256
+_page_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+def _cache_page(page_title: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a resolved page lookup in the TTL cache and return it."""
+    if len(_page_cache) >= _PAGE_CACHE_MAX:
+        _page_cache.pop(next(iter(_page_cache)))
+    _page_cache[page_title] = (time.monotonic() + _PAGE_CACHE_TTL, result)
+    return result
+
 async def search_notion_page(page_title: str) -> str:
     """
     Searches for a Notion page by title using the Notion Search API.
     Returns the first matching page if found; otherwise returns None.
+    Successful lookups are cached for a few minutes.
     """
-    pages = await notion.search(query=page_title, filter={"property": "object", "value": "page"})
+    cached = _page_cache.get(page_title)
+    if cached and cached[0] > time.monotonic():
+        logger.debug("Page cache hit for '%s'", page_title)
+        return cached[1]
+
+    pages = await with_retry(
+        notion.search,
+        query=page_title,
+        filter={"property": "object", "value": "page"},
+        page_size=5,
+        limiter=_notion_limiter
+    )
     if pages:
         for page in pages['results']:
-            if 'title' in page['properties']:
-                if page['properties']['title']['title'][0]['text']['content'] == page_title:
-                    return {'result': "Found", 'page_id': page['id'], 'link': page['url']}
-            elif 'Name' in page['properties']:
-                if page['properties']['Name']['title'][0]['text']['content'] == page_title:
-                    return {'result': "Found", 'page_id': page['id'], 'link': page['url']}
+            title_prop = page.get('properties', {}).get('title') or page.get('properties', {}).get('Name')
+            if title_prop and title_prop['title'][0]['text']['content'] == page_title:
+                return _cache_page(page_title, {'result': "Found", 'page_id': page['id'], 'link': page['url']})
     return None
 
+async def iter_blocks(page_id: str):
+    """
+    Yields the blocks of a Notion page as pagination pages arrive,
+    following has_more/next_cursor until exhausted.
+    """
+    cursor = None
+    while True:
+        if cursor:
+            response = await with_retry(notion.blocks.children.list, page_id,
+                                        start_cursor=cursor, limiter=_notion_limiter)
+        else:
+            response = await with_retry(notion.blocks.children.list, page_id,
+                                        limiter=_notion_limiter)
+        for block in response['results']:
+            yield block
+        if not response.get('has_more'):
+            break
+        cursor = response.get('next_cursor')
+
 async def fetch_page_content(page_id: str) -> str:
     """
     Fetches the content of a Notion page using its ID.
+    Blocks stream into analyze_blocks as pagination pages arrive.
     """
-    response = await notion.blocks.children.list(page_id)
-    
-    blocks = response['results']
-    topics, content = await analyze_blocks(blocks)
+    topics, content = await analyze_blocks(iter_blocks(page_id))
 
     if topics and content:
         return topics, content
     return None
 
+# Worker count bounds concurrent toggle fetches; queue size bounds how far
+# block fetching can run ahead of answer resolution
+_TOGGLE_WORKERS = 10
+_BLOCK_QUEUE_SIZE = 32
+
 async def analyze_blocks(blocks):
     """
     Analyzes the blocks of a Notion page and returns the topics and content.
+    Takes an async iterator of blocks; toggle answers are resolved by a
+    bounded worker pool while later blocks are still being fetched, so peak
+    memory tracks the queue size rather than the page size.
     """
 
     topics = set()
     content = {}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_BLOCK_QUEUE_SIZE)
+
+    async def resolve_toggles():
+        while True:
+            question, block_id = await queue.get()
+            try:
+                answer = await get_toggle_answer(block_id)
+                if answer.strip():
+                    content[question] = answer.strip()
+                    logger.debug("Found Q&A: %.50s...", question)
+            except Exception as e:
+                logger.warning(f"Error fetching answer for block {block_id}: {str(e)}")
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(resolve_toggles()) for _ in range(_TOGGLE_WORKERS)]
+
+    try:
+        async for block in blocks:
+            block_type = block.get('type', '')
+
+            try:
+                # Extract headings as topics
+                if block_type in _HEADING_TYPES:
+                    heading_data = block.get(block_type, {})
+                    rich_text = heading_data.get('rich_text', [])
+                    if rich_text and rich_text[0].get('text'):
+                        heading = rich_text[0]['text']['content']
+                        if heading.strip():
+                            topics.add(heading.strip())
+                            logger.debug("Found heading: %s", heading)
+
+                # Queue toggle blocks as Q&A pairs for the workers
+                elif block_type == 'toggle':
+                    toggle_data = block.get('toggle', {})
+                    rich_text = toggle_data.get('rich_text', [])
+                    if rich_text and rich_text[0].get('text'):
+                        question = rich_text[0]['text']['content']
+                        if question.strip():
+                            await queue.put((question.strip(), block['id']))
+
+            except (KeyError, IndexError, TypeError) as e:
+                logger.warning(f"Error processing block {block.get('id', 'unknown')}: {str(e)}")
+                continue
+
+        await queue.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
 
-    for block in blocks:
-        block_type = block.get('type', '')
-        
-        try:
-            # Extract headings as topics
-            if "heading" in block_type:
-                heading_data = block.get(block_type, {})
-                rich_text = heading_data.get('rich_text', [])
-                if rich_text and rich_text[0].get('text'):
-                    heading = rich_text[0]['text']['content']
-                    if heading.strip():
-                        topics.add(heading.strip())
-                        logger.debug(f"Found heading: {heading}")
-            
-            # Extract toggle blocks as Q&A pairs
-            elif block_type == 'toggle':
-                toggle_data = block.get('toggle', {})
-                rich_text = toggle_data.get('rich_text', [])
-                if rich_text and rich_text[0].get('text'):
-                    question = rich_text[0]['text']['content']
-                    if question.strip():
-                        answer = await get_toggle_answer(block['id'])
-                        if answer.strip():
-                            content[question.strip()] = answer.strip()
-                            logger.debug(f"Found Q&A: {question[:50]}...")
-        
-        except (KeyError, IndexError, TypeError) as e:
-            logger.warning(f"Error processing block {block.get('id', 'unknown')}: {str(e)}")
-            continue
-    
     return topics, content
 
+@dataclass
+class _RenderState:
+    """Tracks numbered-list position across consecutive toggle blocks."""
+    number: int = 1
+    previous_type: Optional[str] = None
+
+def _rich_text_content(rich_text) -> str:
+    """Join the plain-text content of a rich_text array."""
+    return "".join(excerpt['text']['content'] for excerpt in rich_text if 'text' in excerpt)
+
+def _render_paragraph(block, state: _RenderState) -> str:
+    return _rich_text_content(block['paragraph']['rich_text']) + "\n"
+
+def _render_bullet(block, state: _RenderState) -> str:
+    return "- " + _rich_text_content(block['bulleted_list_item']['rich_text']) + "\n"
+
+def _render_numbered(block, state: _RenderState) -> str:
+    if state.previous_type == 'numbered_list_item':
+        state.number += 1
+    else:
+        state.number = 1
+    return f"{state.number}. " + _rich_text_content(block['numbered_list_item']['rich_text']) + "\n"
+
+# Single dict lookup per block instead of an if/elif chain
+_BLOCK_HANDLERS = {
+    'paragraph': _render_paragraph,
+    'bulleted_list_item': _render_bullet,
+    'numbered_list_item': _render_numbered,
+}
+
 async def get_toggle_answer(block_id):
     """
     Fetches the answer for a toggle block using its ID.
     """
-    answer = ""
+    parts = []
 
-    toggle_children = await notion.blocks.children.list(block_id)
+    toggle_children = await with_retry(notion.blocks.children.list, block_id,
+                                       limiter=_notion_limiter)
     toggle_content = toggle_children['results']
 
-    number = 1 #to keep track of numbered list items
-    previous_type = None
+    state = _RenderState()
 
     for block in toggle_content:
-        if block['type'] == 'paragraph':
-            paragraph = block['paragraph']['rich_text']
-            full_text = ""
-            for excerpt in paragraph:
-                if 'text' in excerpt:
-                    full_text += excerpt['text']['content']
-            answer += full_text + "\n"
-        
-        elif block['type'] == 'bulleted_list_item':
-            bullet_note = block['bulleted_list_item']['rich_text']
-            full_bullet = "- "
-            for excerpt in bullet_note:
-                if 'text' in excerpt:
-                    full_bullet += excerpt['text']['content']
-            answer += full_bullet + "\n"
-
-        
-        elif block['type'] == 'numbered_list_item':
-            
-            if previous_type == 'numbered_list_item':
-                number += 1
-            else:
-                number = 1
-            
-            number_item = block['numbered_list_item']['rich_text']
-            full_item = f"{number}. "
-            for excerpt in number_item:
-                if 'text' in excerpt:
-                    full_item += excerpt['text']['content']
-            answer += full_item + "\n"
-
-        previous_type = block['type']
-    
-    return answer
+        handler = _BLOCK_HANDLERS.get(block['type'])
+        if handler:
+            parts.append(handler(block, state))
+        state.previous_type = block['type']
+
+    return "".join(parts)
 
 
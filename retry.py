@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+import aiohttp
+from notion_client.errors import HTTPResponseError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limits and transient server errors
+_RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SlidingWindowLimiter:
+    """
+    Caps the number of requests made within a rolling time window.
+    Keeps a deque of recent request timestamps; acquire() sleeps until
+    the oldest one falls outside the window when the cap is reached.
+    """
+
+    def __init__(self, max_requests: int, window_seconds: float = 1.0):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._timestamps: deque = deque()
+
+    async def acquire(self) -> None:
+        """Wait until a request slot is available, then claim it."""
+        while True:
+            now = time.monotonic()
+            while self._timestamps and now - self._timestamps[0] >= self.window_seconds:
+                self._timestamps.popleft()
+
+            if len(self._timestamps) < self.max_requests:
+                self._timestamps.append(now)
+                return
+
+            await asyncio.sleep(self.window_seconds - (now - self._timestamps[0]))
+
+
+def _retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Read the Retry-After header from an HTTP error, if the server sent one."""
+    headers = getattr(exc, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def with_retry(fn: Callable, *args: Any, max_retries: int = 5, base: float = 1.0,
+                     factor: float = 2.0, limiter: Optional[SlidingWindowLimiter] = None,
+                     **kwargs: Any) -> Any:
+    """
+    Await fn(*args, **kwargs), retrying on 429/5xx responses with
+    exponential backoff plus jitter. Honors the server's Retry-After
+    header when present, and optionally throttles through a
+    SlidingWindowLimiter before each attempt.
+    """
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.acquire()
+
+        try:
+            return await fn(*args, **kwargs)
+        except (HTTPResponseError, aiohttp.ClientResponseError) as e:
+            status = getattr(e, 'status', None)
+            if status not in _RETRYABLE_STATUSES or attempt >= max_retries:
+                raise
+
+            delay = _retry_after_seconds(e)
+            if delay is None:
+                delay = base * factor ** attempt + random.uniform(0, base)
+
+            logger.warning(f"Retryable HTTP {status} (attempt {attempt + 1}/{max_retries}), sleeping {delay:.1f}s")
+            await asyncio.sleep(delay)
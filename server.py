@@ -50,18 +50,29 @@ async def extract_page_content(page_id: str, ctx: Context) -> Dict[str, Any]:
         await ctx.session.send_log_message(level="error", data=f"Error extracting content from page {page_id}: {str(e)}")
         return {"status": "error", "topics": [], "content": {}, "message": f"Content extraction failed: {str(e)}"}
 
+# Background sync tasks; referenced here so they aren't garbage-collected mid-flight
+_background_tasks: set = set()
+
+def _schedule_sync() -> None:
+    """Run sync_decks in the background so callers don't wait on AnkiWeb."""
+    task = asyncio.create_task(sync_decks())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
 async def post_flashcards(page_name: str, cards: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Add flashcards to Anki deck."""
     try:
         logger.info(f"Creating deck: {page_name}")
         await create_deck(page_name)
-        
+
         logger.info(f"Adding {len(cards)} notes to deck")
         result = await add_notes(cards)
-        
-        logger.info("Syncing Anki decks")
-        await sync_decks()
-        
+
+        # Sync is fire-and-forget (failures only warn), so don't block the
+        # response on the Anki<->AnkiWeb round-trip
+        logger.info("Scheduling Anki deck sync in the background")
+        _schedule_sync()
+
         logger.info(f"Successfully added {len(cards)} flashcards to deck '{page_name}'")
         return {"status": "added", "result": result, "message": f"Added {len(cards)} flashcards to Anki deck '{page_name}'"}
     except Exception as e: